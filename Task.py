@@ -1,220 +1,452 @@
 #!/usr/bin/env python3
 # refined_treehouse_tasks.py
 
+import bisect
 import json
 import os
+import sqlite3
+import sys
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 
+DB_FILE = "tasks.db"
+# Tasks saved by older versions; imported once when tasks.db is first created
 DATA_FILE = "tasks.json"
 
-def load_tasks():
+# Stored in PRAGMA user_version once the schema exists and tasks.json (if any)
+# has been imported
+_SCHEMA_VERSION = 1
+
+# position is the display order (what sorting rewrites); id is creation order
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    due_date TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_position ON tasks(position);
+CREATE INDEX IF NOT EXISTS idx_prio ON tasks(priority, position);
+CREATE INDEX IF NOT EXISTS idx_completed ON tasks(completed);
+"""
+
+# Placeholder stored when the user leaves the due date blank; it and any
+# unparseable due date sort after every real date
+_NO_DUE_DATE = "No due date"
+_FAR_FUTURE = datetime(9999, 12, 31)
+
+# Accepted priority inputs; every valid priority is a single digit
+_PRIORITY_INPUTS = frozenset("12345")
+
+# Completed-task counts at which the treehouse reaches levels 1..5
+_LEVEL_THRESHOLDS = (1, 5, 10, 15, 20)
+
+# Main menu, written in one go on every redraw
+_MENU = (
+    "========== Treehouse Tasks ==========\n"
+    "1. Add Task\n"
+    "2. View Tasks\n"
+    "3. Complete Task\n"
+    "4. Remove Task\n"
+    "5. Edit Task\n"
+    "6. Sort Tasks\n"
+    "7. Show My Treehouse\n"
+    "8. Exit\n"
+)
+
+# ASCII art added at each treehouse level; a level shows its own piece on top
+# of every lower level's piece
+_LEVEL_ART = (
+    "  (No tasks completed yet!)\n"
+    "        🌱 A tiny seedling sits alone...\n\n",
+    "          🌳\n"
+    "         🌳🌳\n"
+    "          🌳      A small platform is starting to form!\n"
+    "          ||\n"
+    "          ||\n"
+    "          ||\n",
+    "        _______\n"
+    "       /       \\   The platform is now sturdy!\n"
+    "       |_______|\n",
+    "         /||\\       A ladder, walls, and railings added!\n"
+    "        / || \\\n"
+    "       /  ||  \\\n",
+    "       [__||__]      A cozy rooftop and some decorations!\n"
+    "          ||\n"
+    "          ||\n",
+    "      ~~~~~~~~~~     Lights, furniture, and a hanging swing!\n"
+    "      ~  BONUS ~     It's a dream come true!\n"
+    "      ~~~~~~~~~~\n",
+)
+# Complete picture for each level, joined once at import time
+_TREEHOUSE_ART = (_LEVEL_ART[0],) + tuple(
+    "".join(_LEVEL_ART[1:level + 1]) + "\n" for level in range(1, len(_LEVEL_ART))
+)
+
+@dataclass
+class TaskStore:
+    """
+    All tasks, stored in the SQLite database behind conn.
+    Every mutation is a single-row statement (or one UPDATE per row for a
+    sort) rather than a rewrite of the whole file; call save_tasks to commit.
+    Tasks are addressed by their 0-based index in display order, matching the
+    numbers shown by view_tasks.
+    """
+    conn: sqlite3.Connection
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def rows(self):
+        """
+        Return (description, priority, due_date, completed) for every task in display order.
+        """
+        return self.conn.execute(
+            "SELECT description, priority, due_date, completed FROM tasks ORDER BY position"
+        ).fetchall()
+
+    def _task_at(self, index):
+        return self.conn.execute(
+            "SELECT id, description FROM tasks ORDER BY position LIMIT 1 OFFSET ?", (index,)
+        ).fetchone()
+
+    def description_at(self, index):
+        return self._task_at(index)[1]
+
+    def completed_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks WHERE completed = 1").fetchone()[0]
+
+    def append(self, description, priority, due_date):
+        self.conn.execute(
+            "INSERT INTO tasks (description, priority, due_date, position) "
+            "VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM tasks))",
+            (description, priority, due_date),
+        )
+
+    def pop(self, index):
+        """
+        Remove the task at index and return its description.
+        """
+        task_id, description = self._task_at(index)
+        self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return description
+
+    def mark_completed(self, index):
+        """
+        Mark the task at index completed; returns False if it already was.
+        """
+        task_id, _ = self._task_at(index)
+        cursor = self.conn.execute(
+            "UPDATE tasks SET completed = 1 WHERE id = ? AND completed = 0", (task_id,)
+        )
+        return cursor.rowcount == 1
+
+    def update(self, index, description=None, priority=None, due_date=None):
+        """
+        Overwrite the given fields of the task at index; None keeps the current value.
+        """
+        task_id, _ = self._task_at(index)
+        self.conn.execute(
+            "UPDATE tasks SET description = COALESCE(?, description), "
+            "priority = COALESCE(?, priority), due_date = COALESCE(?, due_date) WHERE id = ?",
+            (description, priority, due_date, task_id),
+        )
+
+    def _reorder(self, query):
+        """
+        Renumber positions in the order of the task ids returned by query.
+        """
+        ids = self.conn.execute(query).fetchall()
+        self.conn.executemany(
+            "UPDATE tasks SET position = ? WHERE id = ?",
+            ((position, task_id) for position, (task_id,) in enumerate(ids)),
+        )
+
+    def sort_by_priority(self):
+        self._reorder("SELECT id FROM tasks ORDER BY priority, position")
+
+    def sort_by_due_date(self):
+        self._reorder("SELECT id FROM tasks ORDER BY due_key(due_date), position")
+
+    def sort_by_creation(self):
+        self._reorder("SELECT id FROM tasks ORDER BY id")
+
+def _import_json(conn):
     """
-    Load tasks from a JSON file if it exists, otherwise return an empty list.
-    Each task is a dictionary with:
+    Copy tasks from a tasks.json written by an older version into the database.
+    The file holds a list of task dictionaries:
         {
             "description": str,
             "priority": int (1=High, 5=Low),
             "due_date": str (YYYY-MM-DD or free-form),
-            "completed": bool
+            "completed": bool,
+            "seq": int (creation order, optional)
         }
     """
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+    with open(DATA_FILE, "rb") as f:
+        records = json.loads(f.read())
+    # Ids follow creation order: rank records by seq (list position when it is
+    # missing), breaking ties by position so mixed files never reuse an id
+    creation_order = sorted(range(len(records)), key=lambda i: (records[i].get("seq", i), i))
+    ids = [0] * len(records)
+    for rank, i in enumerate(creation_order, start=1):
+        ids[i] = rank
+    conn.executemany(
+        "INSERT INTO tasks (id, description, priority, due_date, completed, position) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (ids[i], t["description"], t["priority"], t["due_date"], t["completed"], i)
+            for i, t in enumerate(records)
+        ),
+    )
+
+def _create_schema(conn):
+    """
+    Create the tables and import tasks.json in a single transaction, then mark
+    the database as set up in user_version. If the import fails or is
+    interrupted, everything is rolled back and it is retried on the next run.
+    """
+    try:
+        conn.executescript("BEGIN;" + _SCHEMA)
+        # Databases created before user_version was recorded may already hold tasks
+        has_tasks = conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is not None
+        if not has_tasks and os.path.exists(DATA_FILE):
+            _import_json(conn)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def load_tasks():
+    """
+    Open the task database (tasks.db by default), creating it if needed.
+    A new database is seeded from tasks.json when that file exists.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    # WAL with synchronous=NORMAL keeps each commit to an append to the log
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.create_function("due_key", 1, _due_key, deterministic=True)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+        _create_schema(conn)
+    return TaskStore(conn)
 
 def save_tasks(tasks):
     """
-    Save tasks to a JSON file (tasks.json by default).
+    Commit pending changes to the task database.
+    """
+    tasks.conn.commit()
+
+@lru_cache(maxsize=None)
+def parse_date(d):
+    """
+    Parse a due date as YYYY-MM-DD for sorting.
+    "No due date" or anything in an invalid format sorts last (far future).
+    Results are cached since many tasks share the same due date string.
+    """
+    if d == _NO_DUE_DATE:
+        return _FAR_FUTURE
+    try:
+        return datetime.strptime(d, "%Y-%m-%d")
+    except ValueError:
+        return _FAR_FUTURE
+
+def _due_key(d):
+    """
+    SQL sort key for due dates (registered as due_key), based on parse_date.
     """
-    with open(DATA_FILE, "w") as f:
-        json.dump(tasks, f, indent=4)
+    return parse_date(d).toordinal()
 
 def add_task(tasks):
     """
     Add a new task to the list.
     Prompts for description, priority, and due date.
+    Returns (tasks, changed).
     """
     print("\n-- Add a New Task --")
     description = input("Task description: ").strip()
     if not description:
         print("Task description cannot be empty.")
-        return tasks
+        return tasks, False
 
     # Priority
     while True:
         priority_input = input("Priority (1=High, 5=Low): ").strip()
-        if priority_input.isdigit():
+        if priority_input in _PRIORITY_INPUTS:
             priority_value = int(priority_input)
-            if 1 <= priority_value <= 5:
-                break
+            break
         print("Invalid priority. Please enter a number between 1 and 5.")
 
     # Due Date (optional format enforcement; here we just store what the user enters)
     due_date = input("Due date (YYYY-MM-DD or leave blank): ").strip()
     if due_date == "":
-        due_date = "No due date"
-
-    new_task = {
-        "description": description,
-        "priority": priority_value,
-        "due_date": due_date,
-        "completed": False
-    }
-    tasks.append(new_task)
+        due_date = _NO_DUE_DATE
+
+    tasks.append(description, priority_value, due_date)
     print(f"Task '{description}' added successfully.")
-    return tasks
+    return tasks, True
 
 def view_tasks(tasks):
     """
     Display all tasks with their status, priority, and due date.
     """
     print("\n-- View Tasks --")
-    if not tasks:
+    rows = tasks.rows()
+    if not rows:
         print("No tasks yet! Add one using the 'Add Task' option.")
         return
 
-    for i, task in enumerate(tasks, start=1):
-        status = "✓" if task["completed"] else "✗"
-        print(f"{i}. [{status}] {task['description']} | Priority: {task['priority']} | Due: {task['due_date']}")
-    print()  # Extra newline for spacing
+    # Build the whole listing and write it in one go rather than one print per task
+    lines = [
+        f"{i}. [{'✓' if completed else '✗'}] {description} | Priority: {priority} | Due: {due_date}"
+        for i, (description, priority, due_date, completed) in enumerate(rows, start=1)
+    ]
+    sys.stdout.write("\n".join(lines) + "\n\n")  # Extra newline for spacing
 
 def complete_task(tasks):
     """
     Mark a task as completed.
+    Returns (tasks, changed); completing an already completed task is no change.
     """
     print("\n-- Complete a Task --")
     if not tasks:
         print("No tasks available to complete.")
-        return tasks
+        return tasks, False
 
     view_tasks(tasks)  # Show tasks for reference
 
+    changed = False
+
     try:
         choice = int(input("Enter the task number to mark as completed (0 to cancel): "))
         if choice == 0:
             print("Operation cancelled.")
-            return tasks
+            return tasks, False
         if 1 <= choice <= len(tasks):
-            tasks[choice - 1]["completed"] = True
-            print(f"Task '{tasks[choice - 1]['description']}' marked completed!")
+            changed = tasks.mark_completed(choice - 1)
+            print(f"Task '{tasks.description_at(choice - 1)}' marked completed!")
         else:
             print("Invalid task number.")
     except ValueError:
         print("Please enter a valid number.")
 
-    return tasks
+    return tasks, changed
 
 def remove_task(tasks):
     """
     Remove a task from the list entirely.
+    Returns (tasks, changed).
     """
     print("\n-- Remove a Task --")
     if not tasks:
         print("No tasks to remove.")
-        return tasks
+        return tasks, False
 
     view_tasks(tasks)
 
+    changed = False
+
     try:
         choice = int(input("Enter the task number to remove (0 to cancel): "))
         if choice == 0:
             print("Operation cancelled.")
-            return tasks
+            return tasks, False
         if 1 <= choice <= len(tasks):
-            removed_task = tasks.pop(choice - 1)
-            print(f"Task '{removed_task['description']}' removed.")
+            removed_description = tasks.pop(choice - 1)
+            changed = True
+            print(f"Task '{removed_description}' removed.")
         else:
             print("Invalid task number.")
     except ValueError:
         print("Please enter a valid number.")
 
-    return tasks
+    return tasks, changed
 
 def edit_task(tasks):
     """
     Edit an existing task's fields (description, priority, or due date).
+    Returns (tasks, changed); leaving every field blank is no change.
     """
     print("\n-- Edit a Task --")
     if not tasks:
         print("No tasks to edit.")
-        return tasks
+        return tasks, False
 
     view_tasks(tasks)
 
+    changed = False
+
     try:
         choice = int(input("Enter the task number to edit (0 to cancel): "))
         if choice == 0:
             print("Operation cancelled.")
-            return tasks
+            return tasks, False
         if 1 <= choice <= len(tasks):
-            task = tasks[choice - 1]
-            print(f"Editing Task #{choice}: '{task['description']}'")
+            index = choice - 1
+            print(f"Editing Task #{choice}: '{tasks.description_at(index)}'")
 
             # Edit Description
-            new_description = input("New description (leave blank to keep current): ").strip()
-            if new_description:
-                task["description"] = new_description
+            new_description = input("New description (leave blank to keep current): ").strip() or None
 
             # Edit Priority
+            new_priority = None
             new_priority_str = input("New priority (1=High, 5=Low) [leave blank to keep current]: ").strip()
             if new_priority_str:
-                if new_priority_str.isdigit():
+                if new_priority_str in _PRIORITY_INPUTS:
                     new_priority = int(new_priority_str)
-                    if 1 <= new_priority <= 5:
-                        task["priority"] = new_priority
-                    else:
-                        print("Invalid priority. Keeping old value.")
                 else:
-                    print("Invalid priority input. Keeping old value.")
+                    print("Invalid priority. Keeping old value.")
 
             # Edit Due Date
-            new_due_date = input("New due date (YYYY-MM-DD or blank) [leave blank to keep current]: ").strip()
-            if new_due_date:
-                task["due_date"] = new_due_date
+            new_due_date = input("New due date (YYYY-MM-DD or blank) [leave blank to keep current]: ").strip() or None
 
+            changed = (new_description, new_priority, new_due_date) != (None, None, None)
+            if changed:
+                tasks.update(index, new_description, new_priority, new_due_date)
             print("Task updated successfully.")
         else:
             print("Invalid task number.")
     except ValueError:
         print("Please enter a valid number.")
 
-    return tasks
+    return tasks, changed
 
 def sort_tasks(tasks):
     """
-    Sort tasks by priority or due date.
+    Sort tasks by priority or due date, or put them back in creation order.
+    Returns (tasks, changed); cancelling is no change.
     """
     print("\n-- Sort Tasks --")
     if not tasks:
         print("No tasks to sort.")
-        return tasks
+        return tasks, False
 
     print("1. Sort by Priority (ascending: 1=High, 5=Low)")
     print("2. Sort by Due Date (ascending)")
-    print("3. Cancel")
+    print("3. Restore Creation Order")
+    print("4. Cancel")
     choice = input("Select an option: ").strip()
 
     if choice == "1":
-        tasks.sort(key=lambda t: t["priority"])
+        tasks.sort_by_priority()
         print("Tasks sorted by priority.")
     elif choice == "2":
-        # We'll try to parse due_date as YYYY-MM-DD; if it fails, we treat it as '9999-12-31' (far future)
-        def parse_date(d):
-            try:
-                return datetime.strptime(d, "%Y-%m-%d")
-            except ValueError:
-                # If the date is "No due date" or an invalid format, sort it last
-                return datetime(9999, 12, 31)
-
-        tasks.sort(key=lambda t: parse_date(t["due_date"]))
+        tasks.sort_by_due_date()
         print("Tasks sorted by due date.")
+    elif choice == "3":
+        tasks.sort_by_creation()
+        print("Tasks restored to creation order.")
     else:
         print("Sorting cancelled.")
+        return tasks, False
 
-    return tasks
+    return tasks, True
 
-def get_treehouse_level(tasks):
+def get_treehouse_level(completed_count):
     """
     Return the treehouse level based on how many tasks are completed.
     We'll use the following thresholds:
@@ -225,107 +457,54 @@ def get_treehouse_level(tasks):
         Level 4: 15-19
         Level 5: >= 20
     """
-    completed_count = sum(1 for t in tasks if t["completed"])
-    if completed_count >= 20:
-        return 5
-    elif completed_count >= 15:
-        return 4
-    elif completed_count >= 10:
-        return 3
-    elif completed_count >= 5:
-        return 2
-    elif completed_count >= 1:
-        return 1
-    else:
-        return 0
+    return bisect.bisect_right(_LEVEL_THRESHOLDS, completed_count)
 
 def show_treehouse(tasks):
     """
     Display ASCII art representing the treehouse progress based on completed tasks.
     """
-    level = get_treehouse_level(tasks)
-
-    print("\n=== Your Treehouse ===")
-    if level == 0:
-        print("  (No tasks completed yet!)")
-        print("        🌱 A tiny seedling sits alone...\n")
-        return
-
-    # LEVEL 1
-    if level >= 1:
-        print("          🌳")
-        print("         🌳🌳")
-        print("          🌳      A small platform is starting to form!")
-        print("          ||")
-        print("          ||")
-        print("          ||")
-
-    # LEVEL 2
-    if level >= 2:
-        print("        _______")
-        print("       /       \\   The platform is now sturdy!")
-        print("       |_______|")
-
-    # LEVEL 3
-    if level >= 3:
-        print("         /||\\       A ladder, walls, and railings added!")
-        print("        / || \\")
-        print("       /  ||  \\")
-
-    # LEVEL 4
-    if level >= 4:
-        print("       [__||__]      A cozy rooftop and some decorations!")
-        print("          ||")
-        print("          ||")
-
-    # LEVEL 5
-    if level == 5:
-        print("      ~~~~~~~~~~     Lights, furniture, and a hanging swing!")
-        print("      ~  BONUS ~     It's a dream come true!")
-        print("      ~~~~~~~~~~")
-
-    print()  # Blank line
+    level = get_treehouse_level(tasks.completed_count())
+    sys.stdout.write("\n=== Your Treehouse ===\n" + _TREEHOUSE_ART[level])
+
+# Menu choice -> (handler, mutates). Mutating handlers return (tasks, changed);
+# the others only display the tasks.
+_HANDLERS = {
+    "1": (add_task, True),
+    "2": (view_tasks, False),
+    "3": (complete_task, True),
+    "4": (remove_task, True),
+    "5": (edit_task, True),
+    "6": (sort_tasks, True),
+    "7": (show_treehouse, False),
+}
 
 def main():
     tasks = load_tasks()
 
-    while True:
-        print("========== Treehouse Tasks ==========")
-        print("1. Add Task")
-        print("2. View Tasks")
-        print("3. Complete Task")
-        print("4. Remove Task")
-        print("5. Edit Task")
-        print("6. Sort Tasks")
-        print("7. Show My Treehouse")
-        print("8. Exit")
-
-        choice = input("Select an option: ").strip()
-
-        if choice == "1":
-            tasks = add_task(tasks)
-            save_tasks(tasks)
-        elif choice == "2":
-            view_tasks(tasks)
-        elif choice == "3":
-            tasks = complete_task(tasks)
-            save_tasks(tasks)
-        elif choice == "4":
-            tasks = remove_task(tasks)
-            save_tasks(tasks)
-        elif choice == "5":
-            tasks = edit_task(tasks)
-            save_tasks(tasks)
-        elif choice == "6":
-            tasks = sort_tasks(tasks)
-            save_tasks(tasks)
-        elif choice == "7":
-            show_treehouse(tasks)
-        elif choice == "8":
-            print("Exiting... Thank you for using Treehouse Tasks!")
-            break
-        else:
-            print("Invalid choice. Please try again.")
+    try:
+        while True:
+            sys.stdout.write(_MENU)
+            sys.stdout.flush()
+            choice = input("Select an option: ").strip()
+
+            if choice == "8":
+                print("Exiting... Thank you for using Treehouse Tasks!")
+                break
+
+            handler, mutates = _HANDLERS.get(choice, (None, False))
+            if handler is None:
+                print("Invalid choice. Please try again.")
+            elif mutates:
+                # Only the rows an action touched are written, so each change
+                # is committed right away; actions that changed nothing skip it
+                tasks, changed = handler(tasks)
+                if changed:
+                    save_tasks(tasks)
+            else:
+                handler(tasks)
+    finally:
+        # Anything not yet committed (an action interrupted midway) is rolled back
+        tasks.conn.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file